@@ -1,144 +1,391 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import aiohttp
+from aiolimiter import AsyncLimiter
+from lxml import etree
+from lxml import html as lxml_html
+from pybloom_live import ScalableBloomFilter
 import os
 import time
 from urllib.parse import urlparse, urljoin
+from urllib.robotparser import RobotFileParser
 import sys
 import argparse
-from collections import deque
 import re
 import json
-import random
+import orjson
 import base64
+import codecs
+import email.utils
 import getpass
+import functools
+import threading
+import signal
+import multiprocessing
+from queue import Queue, Full
+from concurrent.futures import ProcessPoolExecutor
 from cryptography.fernet import Fernet
 
+# aiohttp 需要 brotlicffi 或 brotli 才能解碼 br 壓縮的回應，未安裝時不宣告支援
+try:
+    import brotlicffi  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotli  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
+
 # 設定控制台輸出編碼為UTF-8
 sys.stdout.reconfigure(encoding='utf-8')
 
+# 清理文字時要移除的控制字符（保留換行）
+_CTRL_TRANSLATE = dict.fromkeys(i for i in range(32) if i != 0x0A)
+
+@functools.lru_cache(maxsize=None)
+def _load_or_create_key(key_file):
+    """
+    讀取密鑰文件，不存在時產生新密鑰並保存；同一文件只讀取一次
+    """
+    try:
+        with open(key_file, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    key = Fernet.generate_key()
+    with open(key_file, 'wb') as f:
+        f.write(key)
+    return key
+
+def _retry_after(value):
+    """
+    解析 Retry-After 標頭（秒數或 HTTP 日期），無法解析時回傳 0
+    """
+    if not value:
+        return 0
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0
+    return max(0, when.timestamp() - time.time())
+
+def _ignore_sigint():
+    # 中斷信號由主進程處理，工作進程忽略以免各自印出錯誤
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+# 在頁面開頭尋找 <meta charset> 或 http-equiv 中的編碼聲明
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+
+# 位元組順序標記優先於其他編碼聲明，由 libxml2 自行識別
+_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+def _html_parser(encoding):
+    """
+    依編碼名稱建立 lxml 解析器；Python 或 libxml2 不認得此編碼時回傳 None
+    """
+    if not encoding:
+        return None
+    try:
+        canonical = codecs.lookup(encoding).name
+    except LookupError:
+        return None
+    # libxml2 只認得部分名稱寫法，例如接受 euc-jp 但不接受 euc_jp
+    for name in (encoding, canonical, canonical.replace('_', '-')):
+        try:
+            return lxml_html.HTMLParser(encoding=name)
+        except LookupError:
+            pass
+    return None
+
+def _select_parser(body, charset):
+    """
+    決定頁面的編碼：Content-Type 中的編碼、<meta> 聲明，最後嘗試 UTF-8
+    lxml 在沒有指定編碼時會回退到 Latin-1，因此不交給它自行判斷
+    """
+    parser = _html_parser(charset)
+    if parser is None:
+        match = _META_CHARSET_RE.search(body, 0, 4096)
+        parser = match and _html_parser(match.group(1).decode('ascii'))
+    if parser is None:
+        try:
+            body.decode('utf-8')
+            parser = _html_parser('utf-8')
+        except UnicodeDecodeError:
+            parser = _html_parser('cp1252')
+    return parser
+
+def _parse_page(body, charset, base_url):
+    """
+    在工作進程中解析頁面並提取標題、內容和連結
+    :return: (標題, 內容, 連結集合)
+    """
+    parser = None if body.startswith(_BOMS) else _select_parser(body, charset)
+    # 原始位元組直接交給 lxml 解碼
+    try:
+        tree = lxml_html.document_fromstring(body, parser=parser)
+    except LookupError:
+        # 少數編碼名稱 libxml2 到解析時才拒絕，改用 UTF-8
+        tree = lxml_html.document_fromstring(body, parser=_html_parser('utf-8'))
+    return WebScraper.extract_page(tree, base_url)
+
+def _any_of(tokens):
+    return re.compile('|'.join(map(re.escape, tokens)))
+
+def _class_xpath(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
 class WebScraper:
-    def __init__(self, save_directory, max_depth=2, max_pages=50, delay=(1, 3)):
+    # 對應 CSS 選擇器 "script, style, nav, header, footer, .header, .footer, .navigation"
+    _NOISE_TAGS = ('script', 'style', 'nav', 'header', 'footer')
+    _NOISE_XPATH = f"//*[{_class_xpath('header')} or {_class_xpath('footer')} or {_class_xpath('navigation')}]"
+    # 對應 CSS 選擇器 "#main-content, .wiki-content"
+    _MAIN_CONTENT_XPATH = f"(//*[@id='main-content'] | //*[{_class_xpath('wiki-content')}])[1]"
+
+    # 預設請求頭，只在建立會話時設定一次
+    _DEFAULT_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Accept-Encoding': ACCEPT_ENCODING,
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+        'Cache-Control': 'max-age=0'
+    }
+
+    # 重試設定
+    _MAX_RETRIES = 3
+    _RETRY_BACKOFF = 0.3
+    _RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+    # 連線錯誤、逾時和傳輸中斷（回應內容不完整）都視為暫時性錯誤
+    _RETRY_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+    # 進度日誌累積多少條記錄後壓縮成快照
+    _COMPACT_EVERY = 1000
+    # 要求背景線程將文件寫入磁碟的標記
+    _FLUSH = object()
+
+    # URL 過濾規則，預先編譯以便每個連結只需掃描一次
+    _DOWNLOAD_EXTS = frozenset(['.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar'])
+    _DOC_PATH_RE = _any_of(['/display/', '/spaces/'])
+    _EXCLUDE_PATH_RE = _any_of([
+        'action=edit', 'action=history', 'oldid=', 'diff=',
+        'printable=yes', 'mobileaction=', 'feed=', 'redlink=1',
+        '/viewpage.action', 'attachments', 'download'
+    ])
+    _EXCLUDE_QUERY_RE = _any_of([
+        'view=', 'preview=', 'diff', 'pageId=', 'mode=',
+        'download=', 'type=', 'attachment'
+    ])
+
+    def __init__(self, save_directory, max_depth=2, max_pages=50, rate_limit=2, concurrency=10):
         """
         初始化爬蟲類
         :param save_directory: 儲存內容的目錄路徑
         :param max_depth: 最大爬取深度
         :param max_pages: 最大爬取頁面數
-        :param delay: 請求延遲範圍（最小值，最大值）秒
+        :param rate_limit: 每個主機每秒最大請求數
+        :param concurrency: 同時進行的最大請求數
         """
         self.save_directory = save_directory
         self.max_depth = max_depth
         self.max_pages = max_pages
-        self.delay = delay
+        self.rate_limit = rate_limit
+        self.concurrency = concurrency
         self.visited_urls = set()
-        self.session = requests.Session()
-        self.session.verify = False
+        self._enqueued = None
+        self.auth = None
+        self.sem = None
+        self._limiters = {}
         self.all_content_file = os.path.join(save_directory, 'all_scraped_content.txt')
         self.config_file = os.path.join(save_directory, '.config')
         
+        # 創建儲存目錄和進度保存目錄（需在讀寫密鑰文件之前）
+        self.progress_dir = os.path.join(save_directory, '_progress')
+        os.makedirs(self.progress_dir, exist_ok=True)
+        
         # 使用固定的密鑰文件
         self.key_file = os.path.join(save_directory, '.key')
-        if os.path.exists(self.key_file):
-            with open(self.key_file, 'rb') as f:
-                self.key = f.read()
-        else:
-            self.key = Fernet.generate_key()
-            with open(self.key_file, 'wb') as f:
-                f.write(self.key)
-        
+        self.key = _load_or_create_key(self.key_file)
         self.cipher_suite = Fernet(self.key)
         
-        # 創建必要的目錄
-        if not os.path.exists(save_directory):
-            os.makedirs(save_directory)
+        self.progress_file = os.path.join(self.progress_dir, 'progress.json')
+        self.journal_file = os.path.join(self.progress_dir, 'visited.log')
         
-        # 創建進度保存目錄
-        self.progress_dir = os.path.join(save_directory, '_progress')
-        if not os.path.exists(self.progress_dir):
-            os.makedirs(self.progress_dir)
+        # 保持輸出文件開啟，避免每個頁面都重新開檔
+        self._out = open(self.all_content_file, 'a', encoding='utf-8', buffering=1 << 20)
+        
+        # 進度日誌：每個新爬取的URL追加一行，定期壓縮成 progress.json 快照
+        self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        self._journal_size = 0
+        
+        # 背景寫入線程，讓磁碟寫入不阻塞爬取
+        self._write_q = Queue(maxsize=64)
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
+        
+        # 解析頁面屬於 CPU 密集工作，交給多個進程處理；
+        # 已有背景線程在運行，使用 spawn 避免在多線程下 fork
+        self._pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_ignore_sigint
+        )
+
+    def close(self):
+        """
+        關閉解析進程池，等待背景寫入完成並關閉輸出文件和進度日誌
+        """
+        self._pool.shutdown()
+        if self._writer.is_alive():
+            self._write_q.put(None)
+            self._writer.join()
+        for f in (self._out, self._journal):
+            if not f.closed:
+                f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def set_auth(self, username, password):
         """
         設置基本認證
         """
-        self.session.auth = (username, password)
+        self.auth = aiohttp.BasicAuth(username, password)
+
+    def create_session(self):
+        """
+        建立共用連線池的 aiohttp 會話
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.concurrency,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            ssl=False
+        )
+        return aiohttp.ClientSession(connector=connector, auth=self.auth, headers=self._DEFAULT_HEADERS)
 
     def load_progress(self, start_url):
         """
-        加載之前的爬取進度
+        加載之前的爬取進度（快照加上之後的日誌記錄）
         """
-        progress_file = os.path.join(self.progress_dir, 'progress.json')
-        if os.path.exists(progress_file):
-            try:
-                with open(progress_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if data.get('start_url') == start_url:
-                        self.visited_urls = set(data.get('visited_urls', []))
-                        print(f"已加載之前的進度，已爬取 {len(self.visited_urls)} 個頁面")
-                        return True
-            except Exception as e:
-                print(f"加載進度時發生錯誤: {str(e)}")
+        try:
+            with open(self.progress_file, 'rb') as f:
+                data = orjson.loads(f.read())
+                if data.get('start_url') == start_url:
+                    self.visited_urls = set(data.get('visited_urls', []))
+                    with open(self.journal_file, 'r', encoding='utf-8') as journal:
+                        journaled = [line for line in journal.read().splitlines() if line]
+                    self.visited_urls.update(journaled)
+                    self._journal_size = len(journaled)
+                    print(f"已加載之前的進度，已爬取 {len(self.visited_urls)} 個頁面")
+                    return True
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"加載進度時發生錯誤: {str(e)}")
         return False
 
-    def save_progress(self, start_url):
+    def save_progress(self, start_url, compact=False):
         """
         保存爬取進度
+        :param compact: 是否將日誌壓縮成完整快照；日誌過長時也會自動壓縮
         """
-        progress_file = os.path.join(self.progress_dir, 'progress.json')
         try:
+            if not compact and self._journal_size < self._COMPACT_EVERY:
+                # 由背景線程依序將內容和日誌寫入磁碟，不阻塞呼叫端；
+                # 隊列已滿表示線程正忙，留待下一次保存
+                try:
+                    self._write_q.put_nowait(self._FLUSH)
+                except Full:
+                    pass
+                return True
+            
+            # 壓縮前等待背景線程寫完所有內容和日誌，使快照與內容文件保持一致
+            self._write_q.join()
+            self._out.flush()
+            self._journal.flush()
             data = {
                 'start_url': start_url,
                 'visited_urls': list(self.visited_urls),
                 'timestamp': time.time()
             }
-            with open(progress_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(self.progress_file, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            
+            # 快照已包含所有記錄，清空日誌
+            self._journal.truncate(0)
+            self._journal_size = 0
             return True
         except Exception as e:
             print(f"保存進度時發生錯誤: {str(e)}")
             return False
 
-    def is_valid_url(self, url, base_url):
+    async def _save_progress_async(self, start_url):
+        """
+        在事件循環中定期保存進度；需要壓縮時先在線程池中等待背景寫入完成
+        """
+        if self._journal_size >= self._COMPACT_EVERY:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_q.join)
+        return self.save_progress(start_url)
+
+    def _mark_visited(self, url):
+        """
+        記錄已爬取的頁面；進度日誌由背景線程在寫入內容後追加
+        """
+        self.visited_urls.add(url)
+        self._journal_size += 1
+
+    @classmethod
+    def is_valid_url(cls, url, base_netloc):
         """
         檢查URL是否有效且在目標範圍內
+        :param base_netloc: 來源頁面的域名，由呼叫端預先解析
         """
         try:
             parsed = urlparse(url)
-            base_parsed = urlparse(base_url)
             
             # 檢查域名
-            if parsed.netloc != base_parsed.netloc:
+            if parsed.netloc != base_netloc:
                 print(f"跳過外部鏈接: {url}")
                 return False
             
+            path_lower = parsed.path.lower()
+            ext = os.path.splitext(path_lower)[1]
+            
             # 檢查是否是 PDF 文件
-            if parsed.path.lower().endswith('.pdf'):
+            if ext == '.pdf':
                 print(f"跳過 PDF 文件: {url}")
                 return False
                 
             # 檢查是否是其他文件類型
-            if any(parsed.path.lower().endswith(ext) for ext in ['.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar']):
+            if ext in cls._DOWNLOAD_EXTS:
                 print(f"跳過文件下載鏈接: {url}")
                 return False
             
             # 檢查是否是 Confluence 空間
-            if not any(x in parsed.path.lower() for x in ['/display/', '/spaces/']):
+            if not cls._DOC_PATH_RE.search(path_lower):
                 print(f"跳過非文檔頁面: {url}")
                 return False
             
             # 排除特殊頁面
-            if any(x in parsed.path.lower() for x in [
-                'action=edit', 'action=history', 'oldid=', 'diff=', 
-                'printable=yes', 'mobileaction=', 'feed=', 'redlink=1',
-                '/viewpage.action', 'attachments', 'download'
-            ]):
+            if cls._EXCLUDE_PATH_RE.search(path_lower):
                 print(f"跳過特殊頁面: {url}")
                 return False
                 
             # 排除特殊參數
-            if parsed.query and any(x in parsed.query.lower() for x in [
-                'view=', 'preview=', 'diff', 'pageId=', 'mode=',
-                'download=', 'type=', 'attachment'
-            ]):
+            if parsed.query and cls._EXCLUDE_QUERY_RE.search(parsed.query.lower()):
                 print(f"跳過帶特殊參數的頁面: {url}")
                 return False
             
@@ -147,58 +394,161 @@ class WebScraper:
             print(f"無效的URL: {url}")
             return False
 
-    def extract_links(self, soup, base_url):
+    @classmethod
+    def extract_page(cls, tree, base_url):
+        """
+        從已解析的頁面樹中一次提取標題、內容和連結
+        :return: (標題, 內容, 連結集合)
+        """
+        # 移除不需要的元素：標籤一次在 libxml2 中刪除，class 匹配的元素再逐一移除
+        etree.strip_elements(tree, *cls._NOISE_TAGS, with_tail=False)
+        for element in tree.xpath(cls._NOISE_XPATH):
+            element.drop_tree()
+        
+        # 特別處理 Confluence 頁面的主要內容
+        main_content = tree.xpath(cls._MAIN_CONTENT_XPATH)
+        main_content = main_content[0] if main_content else tree
+        
+        # 提取標題
+        title = tree.xpath('(//title | //h1)[1]')
+        title_text = title[0].text_content().strip() if title else ''
+        
+        # 提取內容
+        content = cls.clean_text(main_content.text_content())
+        
+        return title_text, content, cls.extract_links(tree, base_url)
+
+    @classmethod
+    def extract_links(cls, tree, base_url):
         """
-        從頁面中提取有效的連結
+        從已解析的頁面樹中提取有效的連結
         """
         links = set()
-        all_links = soup.find_all('a', href=True)
+        all_links = tree.xpath('//a/@href')
         print(f"\n在頁面中找到 {len(all_links)} 個連結")
         
-        for link in all_links:
-            url = urljoin(base_url, link['href'])
-            if self.is_valid_url(url, base_url):
+        # 來源頁面的域名每頁只解析一次
+        base_netloc = urlparse(base_url).netloc
+        for href in all_links:
+            url = urljoin(base_url, href)
+            if cls.is_valid_url(url, base_netloc):
                 links.add(url)
         
         print(f"其中有 {len(links)} 個有效連結")
         return links
 
-    def clean_text(self, text):
+    @staticmethod
+    def clean_text(text):
         """
         清理文字內容
         """
         # 移除多餘的空白
         text = ' '.join(text.split())
         # 移除特殊控制字符
-        text = ''.join(char for char in text if ord(char) >= 32 or char == '\n')
-        return text
+        return text.translate(_CTRL_TRANSLATE)
 
-    def wait(self):
+    def _limiter(self, session, url):
         """
-        根據設定的延遲範圍等待
+        取得URL所屬主機的速率限制器，每個主機只建立一次
         """
-        time.sleep(random.uniform(self.delay[0], self.delay[1]))
+        parsed = urlparse(url)
+        limiter = self._limiters.get(parsed.netloc)
+        if limiter is None:
+            limiter = asyncio.ensure_future(self._create_limiter(session, parsed.scheme, parsed.netloc))
+            self._limiters[parsed.netloc] = limiter
+        return limiter
 
-    def save_content(self, url, content):
+    async def _create_limiter(self, session, scheme, host):
         """
-        保存內容到統一的文件中
+        為主機建立速率限制器，若 robots.txt 指定了 Crawl-delay 則依其設定
         """
+        delay = None
         try:
-            with open(self.all_content_file, 'a', encoding='utf-8') as f:
-                f.write(f"\n{'='*80}\n")
-                f.write(f"URL: {url}\n")
-                f.write(f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"{'='*80}\n\n")
-                f.write(content)
-                f.write("\n\n")
-            return True
+            async with session.get(f"{scheme}://{host}/robots.txt", timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    robots = RobotFileParser()
+                    # robots.txt 規定使用 UTF-8，直接指定以免 aiohttp 對內容做編碼偵測
+                    robots.parse((await response.text(encoding='utf-8', errors='replace')).splitlines())
+                    delay = robots.crawl_delay(session.headers.get('User-Agent', '*'))
         except Exception as e:
-            print(f"保存內容時發生錯誤: {str(e)}")
-            return False
+            print(f"讀取 robots.txt 時發生錯誤: {str(e)}")
+        
+        if delay:
+            print(f"{host} 的 robots.txt 指定 Crawl-delay: {delay} 秒")
+            return AsyncLimiter(1, float(delay))
+        # 以「每 1/rate 秒一個請求」表示，rate 小於 1 時容量仍為 1
+        return AsyncLimiter(1, 1 / self.rate_limit)
 
-    def scrape_webpage(self, url, depth=0):
+    async def save_content(self, url, content):
+        """
+        將內容交給背景線程寫入統一的文件中
+        """
+        item = (url, content, time.strftime('%Y-%m-%d %H:%M:%S'))
+        try:
+            self._write_q.put_nowait(item)
+        except Full:
+            # 隊列已滿時在線程池中等待空位，不阻塞事件循環
+            await asyncio.get_running_loop().run_in_executor(None, self._write_q.put, item)
+        return True
+
+    def _writer_loop(self):
+        """
+        背景線程：依序將隊列中的內容寫入文件，並在內容之後追加進度日誌
+        """
+        while True:
+            item = self._write_q.get()
+            try:
+                if item is None:
+                    return
+                if item is self._FLUSH:
+                    self._out.flush()
+                    self._journal.flush()
+                    continue
+                url, content, timestamp = item
+                self._out.write(
+                    f"\n{'='*80}\n"
+                    f"URL: {url}\n"
+                    f"Time: {timestamp}\n"
+                    f"{'='*80}\n\n"
+                    f"{content}\n\n"
+                )
+                self._journal.write(url + '\n')
+            except Exception as e:
+                print(f"保存內容時發生錯誤: {str(e)}")
+            finally:
+                self._write_q.task_done()
+
+    async def _fetch(self, session, url, depth):
+        """
+        在並發限制下下載網頁內容
+        :return: (原始位元組, Content-Type 中的編碼)
+        """
+        limiter = await self._limiter(session, url)
+        print(f"正在爬取 (深度 {depth}): {url}")
+        
+        # 遇到暫時性錯誤時以指數退避重試
+        for attempt in range(self._MAX_RETRIES + 1):
+            retry = attempt < self._MAX_RETRIES
+            delay = self._RETRY_BACKOFF * (2 ** attempt)
+            # 每個主機各自限速，等待期間不佔用並發名額
+            await limiter.acquire()
+            async with self.sem:
+                try:
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                        if not (retry and response.status in self._RETRY_STATUSES):
+                            response.raise_for_status()
+                            return await response.read(), response.charset
+                        # 伺服器以 Retry-After 要求等待更久時依其設定
+                        delay = max(delay, _retry_after(response.headers.get('Retry-After')))
+                except self._RETRY_ERRORS:
+                    if not retry:
+                        raise
+            await asyncio.sleep(delay)
+
+    async def scrape_webpage(self, session, url, depth=0):
         """
         爬取指定網頁的內容
+        :param session: aiohttp 會話
         :param url: 要爬取的網頁URL
         :param depth: 當前爬取深度
         :return: (內容, 連結集合)
@@ -210,112 +560,149 @@ class WebScraper:
             return None, set()
 
         try:
-            print(f"正在爬取 (深度 {depth}): {url}")
-            self.wait()
-            
-            # 添加更多的請求頭
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Cache-Control': 'max-age=0'
-            }
-            
-            response = self.session.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 移除不需要的元素
-            for element in soup.select('script, style, nav, header, footer, .header, .footer, .navigation'):
-                element.decompose()
+            body, charset = await self._fetch(session, url, depth)
             
-            # 特別處理 Confluence 頁面的主要內容
-            main_content = soup.select_one('#main-content, .wiki-content') or soup
-            
-            # 提取標題
-            title = soup.select_one('title, h1')
-            title_text = title.get_text().strip() if title else ''
-            
-            # 提取內容
-            content = self.clean_text(main_content.get_text())
+            # 在進程池中解析，事件循環可以繼續下載其他頁面
+            loop = asyncio.get_running_loop()
+            title_text, content, links = await loop.run_in_executor(self._pool, _parse_page, body, charset, url)
             
             # 組合完整內容
             full_content = f"標題：{title_text}\n\n{content}" if title_text else content
             
-            links = self.extract_links(soup, url)
-            
             # 保存內容到統一文件
-            self.save_content(url, full_content)
+            await self.save_content(url, full_content)
             
-            self.visited_urls.add(url)
+            self._mark_visited(url)
             return content, links
             
         except Exception as e:
             print(f"爬取頁面時發生錯誤: {str(e)}")
             return None, set()
 
-    def crawl(self, start_url):
+    @staticmethod
+    def _progress_key(start_urls):
         """
-        從指定URL開始爬取
+        進度文件中記錄的起始URL；只有一個時保持原本的字串格式
         """
+        if isinstance(start_urls, str):
+            return start_urls
+        return start_urls[0] if len(start_urls) == 1 else list(start_urls)
+
+    async def crawl_async(self, start_urls, session=None):
+        """
+        從一個或多個起始URL開始並發爬取
+        :param start_urls: 起始URL或URL列表，所有起始URL共用同一個隊列和工作協程
+        :param session: 共用的 aiohttp 會話，未提供時自行建立
+        """
+        if isinstance(start_urls, str):
+            start_urls = [start_urls]
+        start_url = self._progress_key(start_urls)
+        
         # 檢查是否有之前的進度
         if not self.load_progress(start_url):
             self.visited_urls.clear()
+            # 以空快照開始新的爬取，並清空舊的日誌
+            self.save_progress(start_url, compact=True)
         
-        # 使用隊列來實現廣度優先搜索
-        queue = deque([(start_url, 0)])  # (url, depth)
+        # 使用隊列和多個工作協程來實現並發的廣度優先搜索
+        self.sem = asyncio.Semaphore(self.concurrency)
+        self._limiters = {}
+        queue = asyncio.Queue()
+        # 已加入隊列的URL只需判斷是否出現過，使用 Bloom filter 節省記憶體
+        self._enqueued = ScalableBloomFilter(initial_capacity=100000, error_rate=0.001)
+        for url in start_urls:
+            if url not in self._enqueued:
+                self._enqueued.add(url)
+                queue.put_nowait((url, 0))  # (url, depth)
+        in_flight = 0
+        page_done = asyncio.Condition()
         
+        async def worker(session):
+            nonlocal in_flight
+            while True:
+                url, depth = await queue.get()
+                try:
+                    if url in self.visited_urls:
+                        print(f"跳過已訪問的頁面: {url}")
+                        continue
+                    
+                    # 已爬取加上進行中的頁面達到上限時先等待，進行中的頁面可能失敗而空出名額
+                    async with page_done:
+                        await page_done.wait_for(
+                            lambda: len(self.visited_urls) + in_flight < self.max_pages
+                            or len(self.visited_urls) >= self.max_pages
+                        )
+                    
+                    # 已爬取的頁面本身達到上限時才放棄此URL
+                    if len(self.visited_urls) >= self.max_pages or url in self.visited_urls:
+                        continue
+                    
+                    in_flight += 1
+                    try:
+                        content, links = await self.scrape_webpage(session, url, depth)
+                    finally:
+                        in_flight -= 1
+                        async with page_done:
+                            page_done.notify_all()
+                    
+                    if content:
+                        print(f"成功爬取頁面: {url}")
+                    else:
+                        print(f"無法爬取頁面: {url}")
+                    
+                    # 將新的連結加入隊列
+                    if depth < self.max_depth:
+                        new_links = 0
+                        for link in links:
+                            if link not in self.visited_urls and link not in self._enqueued:
+                                self._enqueued.add(link)
+                                queue.put_nowait((link, depth + 1))
+                                new_links += 1
+                        print(f"添加了 {new_links} 個新連結到隊列")
+                    
+                    # 定期保存進度
+                    if content and len(self.visited_urls) % 5 == 0:
+                        await self._save_progress_async(start_url)
+                        print(f"\n當前進度：已爬取 {len(self.visited_urls)} 個頁面，隊列中還有 {queue.qsize()} 個頁面")
+                finally:
+                    queue.task_done()
+        
+        owns_session = session is None
         try:
-            while queue and len(self.visited_urls) < self.max_pages:
-                url, depth = queue.popleft()
-                
-                if url in self.visited_urls:
-                    print(f"跳過已訪問的頁面: {url}")
-                    continue
-                
-                print(f"\n正在爬取 (深度 {depth}): {url}")
-                content, links = self.scrape_webpage(url, depth)
-                
-                if content:
-                    print(f"成功爬取頁面: {url}")
-                else:
-                    print(f"無法爬取頁面: {url}")
-                
-                # 將新的連結加入隊列
-                if depth < self.max_depth:
-                    new_links = 0
-                    for link in links:
-                        if link not in self.visited_urls:
-                            queue.append((link, depth + 1))
-                            new_links += 1
-                    print(f"添加了 {new_links} 個新連結到隊列")
-                
-                # 定期保存進度
-                if len(self.visited_urls) % 5 == 0:
-                    self.save_progress(start_url)
-                    print(f"\n當前進度：已爬取 {len(self.visited_urls)} 個頁面，隊列中還有 {len(queue)} 個頁面")
+            if owns_session:
+                session = self.create_session()
+            workers = [asyncio.create_task(worker(session)) for _ in range(self.concurrency)]
+            try:
+                await queue.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                if owns_session:
+                    await session.close()
             
-            # 最後保存一次進度
-            self.save_progress(start_url)
+            # 最後保存一次完整快照
+            self.save_progress(start_url, compact=True)
             print(f"\n爬取完成！共爬取了 {len(self.visited_urls)} 個頁面")
             
-        except KeyboardInterrupt:
-            print("\n檢測到中斷信號，正在保存進度...")
-            self.save_progress(start_url)
-            print("進度已保存")
+        except asyncio.CancelledError:
+            # 由中斷信號觸發，交由 crawl() 保存進度
+            raise
             
         except Exception as e:
             print(f"\n爬取過程中發生錯誤: {str(e)}")
-            self.save_progress(start_url)
+            self.save_progress(start_url, compact=True)
+
+    def crawl(self, start_urls):
+        """
+        從一個或多個起始URL開始爬取
+        """
+        try:
+            asyncio.run(self.crawl_async(start_urls))
+        except KeyboardInterrupt:
+            print("\n檢測到中斷信號，正在保存進度...")
+            self.save_progress(self._progress_key(start_urls), compact=True)
+            print("進度已保存")
 
     def save_credentials(self, username, password):
         """
@@ -340,36 +727,77 @@ class WebScraper:
         讀取加密的認證信息
         """
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                username = config['username']
-                encrypted_password = config['password'].encode()
-                password = self.cipher_suite.decrypt(encrypted_password).decode()
-                return username, password
+            with open(self.config_file, 'r') as f:
+                config = json.load(f)
+            username = config['username']
+            encrypted_password = config['password'].encode()
+            password = self.cipher_suite.decrypt(encrypted_password).decode()
+            return username, password
+        except FileNotFoundError:
+            pass
         except Exception as e:
             print(f"讀取認證信息時發生錯誤: {str(e)}")
         return None, None
 
+def _positive_float(value):
+    """
+    argparse 用的正數檢查
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"無效的數字: {value}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"必須大於 0: {value}")
+    return number
+
+def _positive_int(value):
+    """
+    argparse 用的正整數檢查
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"無效的整數: {value}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"必須大於 0: {value}")
+    return number
+
 def main():
     parser = argparse.ArgumentParser(description='網頁爬蟲工具')
-    parser.add_argument('url', help='要爬取的起始URL')
+    parser.add_argument('url', nargs='?', help='要爬取的起始URL')
+    parser.add_argument('--urls-file', help='包含多個起始URL的文件，每行一個，將並發爬取')
     parser.add_argument('--depth', type=int, default=2, help='最大爬取深度（默認：2）')
-    parser.add_argument('--max-pages', type=int, default=50, help='最大爬取頁面數（默認：50）')
+    parser.add_argument('--max-pages', type=int, default=50, help='最大爬取頁面數，多個起始URL時為所有URL合計（默認：50）')
     parser.add_argument('--output-dir', default='scraped_content', help='輸出目錄（默認：scraped_content）')
     parser.add_argument('--username', help='認證用戶名')
     parser.add_argument('--password', help='認證密碼')
-    parser.add_argument('--min-delay', type=float, default=1, help='最小請求延遲秒數（默認：1）')
-    parser.add_argument('--max-delay', type=float, default=3, help='最大請求延遲秒數（默認：3）')
+    parser.add_argument('--rate-limit', type=_positive_float, default=2, help='每個主機每秒最大請求數（默認：2）')
+    parser.add_argument('--concurrency', type=_positive_int, default=10, help='同時進行的最大請求數（默認：10）')
     parser.add_argument('--save-credentials', action='store_true', help='保存認證信息')
 
     args = parser.parse_args()
     
+    # 收集起始URL
+    start_urls = [args.url] if args.url else []
+    if args.urls_file:
+        try:
+            with open(args.urls_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        start_urls.append(line)
+        except OSError as e:
+            parser.error(f"無法讀取URL文件: {str(e)}")
+    if not start_urls:
+        parser.error('請提供起始URL或 --urls-file')
+    
     scraper = WebScraper(
         args.output_dir,
         max_depth=args.depth,
         max_pages=args.max_pages,
-        delay=(args.min_delay, args.max_delay)
+        rate_limit=args.rate_limit,
+        concurrency=args.concurrency
     )
 
     # 處理認證信息
@@ -403,12 +831,14 @@ def main():
         scraper.set_auth(username, password)
 
     try:
-        scraper.crawl(args.url)
+        scraper.crawl(start_urls)
     except KeyboardInterrupt:
         print("\n檢測到中斷信號，正在結束...")
     except Exception as e:
         print(f"\n發生錯誤: {str(e)}")
         sys.exit(1)
+    finally:
+        scraper.close()
 
 if __name__ == "__main__":
     main()